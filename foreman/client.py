@@ -4,15 +4,27 @@ This module provides access to the API of a foreman server
 import re
 import six
 import json
-import copy
+import keyword
 import types
 import pprint
 import logging
 import os.path
 import pkgutil
-import glob
+import importlib
+import sys
+import marshal
+import hashlib
+import time
+import threading
+from collections import OrderedDict
 
 import requests
+from six.moves import cPickle as pickle
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 try:
     import foreman_plugins
@@ -20,15 +32,46 @@ try:
     PLUGINS = [name for _, name, _ in pkgutil.iter_modules([PKG_PATH])]
 except ImportError:
     PLUGINS = []
+# plugin modules starting with '_' are private, and not loaded
+VISIBLE_PLUGINS = [plugin for plugin in PLUGINS if not plugin.startswith('_')]
 
 
 if requests.__version__.split('.', 1)[0] == '0':
     OLD_REQ = True
 else:
     OLD_REQ = False
+    from requests.adapters import HTTPAdapter
+    try:
+        from requests.packages.urllib3.util.retry import Retry
+    except ImportError:
+        # requests < 2.4 only accepts a number of retries
+        Retry = None
+
+VERSION_REG = re.compile(r'Version\s+(?P<version>[^\s<]+)?')
 
 logger = logging.getLogger(__name__)
 
+# already parsed version strings
+_VERSION_CACHE = {}
+
+# resource class names, by resource name
+_CLS_NAME_CACHE = {}
+
+# parsed local json definitions, by path, along with the file mtime
+_LOCAL_DEFS_CACHE = {}
+
+# generated resource classes, by compiled cache and json definitions, see
+# Foreman._get_resource_classes_key
+_RESOURCE_CLASS_CACHE = {}
+
+# autodetected foreman versions and when they were detected, by server url,
+# only used when the clients set a version_cache_ttl
+_SERVER_VERSION_CACHE = {}
+
+# generated api functions, keyed by their signature, so api methods that
+# share the same definition are compiled only once
+_FUNC_CACHE = {}
+
 
 def set_loglevel(level):
     """
@@ -40,10 +83,9 @@ def set_loglevel(level):
 
 
 def try_int(what):
-    try:
+    if isinstance(what, six.string_types) and what.isdigit():
         return int(what)
-    except ValueError:
-        return what
+    return what
 
 
 def parse_version(version_string):
@@ -54,10 +96,59 @@ def parse_version(version_string):
     ints of different number of chars (2<10 but '2'>'10'). So we just accept
     that any element with chars will be considered lesser to any int element.
     """
-    return tuple(
-        try_int(token)
-        for token in version_string.replace('-', '.', 1).split('.')
-    )
+    if version_string not in _VERSION_CACHE:
+        _VERSION_CACHE[version_string] = tuple(
+            try_int(token)
+            for token in version_string.replace('-', '.', 1).split('.')
+        )
+    return _VERSION_CACHE[version_string]
+
+
+def load_json(path):
+    """
+    :param path: Path to the json file to load
+
+    Loads the given json file, using orjson if it's available as it's way
+    faster than the json module for big files like the api definitions.
+    """
+    if orjson is not None:
+        with open(path, 'rb') as json_fd:
+            return orjson.loads(json_fd.read())
+
+    with open(path) as json_fd:
+        return json.load(json_fd)
+
+
+def dump_json(data):
+    """
+    :param data: Data to serialize
+
+    Serializes the given data to json, using orjson if it's available.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data)
+
+
+# the response and request accessors depend on the requests version and the
+# available json module, so pick them once instead of on each request
+if OLD_REQ:
+    def _response_json(res):
+        return res.json
+
+    def _request_body(res):
+        return res.request.data
+else:
+    if orjson is not None:
+        def _response_json(res):
+            # parse the raw bytes, skipping requests' text decoding
+            return orjson.loads(res.content)
+    else:
+        def _response_json(res):
+            return res.json()
+
+    def _request_body(res):
+        return res.request.body
 
 
 def res_to_str(res):
@@ -66,8 +157,10 @@ def res_to_str(res):
 
     Parse the given request and generate an informative string from it
     """
-    if 'Authorization' in res.request.headers:
-        res.request.headers['Authorization'] = "*****"
+    # mask the credentials on a copy, the request must be left untouched
+    headers = dict(res.request.headers)
+    if 'Authorization' in headers:
+        headers['Authorization'] = "*****"
     return """
 ####################################
 url = %s
@@ -84,8 +177,8 @@ reason = %s
 ------------------------------------
 ####################################
 """ % (res.url,
-       str(res.request.headers),
-       OLD_REQ and res.request.data or res.request.body,
+       str(headers),
+       _request_body(res),
        res.headers,
        res.status_code,
        res.reason,
@@ -93,14 +186,22 @@ reason = %s
 
 
 class ForemanException(Exception):
-    def __init__(self, res, msg):
+    def __init__(self, res, msg=None):
         """
         This exception wraps an error message and let's the caller to get the
         :class:`requests.Response` that failed
+
+        If no message is passed, it's generated from the response only when
+        the exception is converted to string.
         """
         Exception.__init__(self, msg)
         self.res = res
 
+    def __str__(self):
+        if self.args[0] is None and self.res is not None:
+            return 'Something went wrong:%s' % res_to_str(self.res)
+        return Exception.__str__(self)
+
 
 class ObjectNotFound(ForemanException):
     pass
@@ -118,13 +219,16 @@ class MethodAPIDescription(object):
     exclude_html_reg = re.compile('</?[^>/]+/?>')
     resource_pattern = re.compile(
         r'^/(api|katello/api)(/v[12])?/(?P<resource>\w+).*')
+    url_params_reg = re.compile(r'/:([^/]+)(?:/|$)')
+    strip_params_reg = re.compile(r'_:[^/]+')
+    params_reg = re.compile(r':([^/]+)')
 
     def __init__(self, resource, method, api):
-        self._method = copy.deepcopy(method)
-        self._api = copy.deepcopy(api)
+        self._method = method
+        self._api = api
         self._apipie_resource = resource
         self.url = self._api['api_url']
-        self.url_params = re.findall('/:([^/]+)(?:/|$)', self.url)
+        self.url_params = self.url_params_reg.findall(self.url)
         self.params = self._method['params']
         self.resource = self.parse_resource_from_url(self.url) or ''
         self.name = self._get_name()
@@ -134,7 +238,8 @@ class MethodAPIDescription(object):
     def __repr__(self):
         return "<resource:%s, name:%s>" % (self.resource, self.name)
 
-    def parse_resource_from_url(self, url):
+    @classmethod
+    def parse_resource_from_url(cls, url):
         """
         Returns the appropriate resource name for the given URL.
 
@@ -147,7 +252,7 @@ class MethodAPIDescription(object):
         elif url == '/katello':
             return 'katello'
 
-        match = self.resource_pattern.match(url)
+        match = cls.resource_pattern.match(url)
         if match:
             return match.groupdict().get('resource', None)
 
@@ -173,7 +278,7 @@ class MethodAPIDescription(object):
             if base_name.startswith(':'):
                 base_name = base_name.split('_')[-1]
             # one_:two_three_:four_five -> one_three_five
-            base_name = re.sub('_:[^/]+', '', base_name)
+            base_name = self.strip_params_reg.sub('', base_name)
             # in case that the last term was a parameter
             if base_name.endswith('_'):
                 base_name = base_name[:-1]
@@ -193,9 +298,25 @@ class MethodAPIDescription(object):
     def get_global_method_name(self):
         return '%s_%s' % (self.resource, self.name.replace('.', '_'))
 
-    def generate_func(self, as_global=False):
+    def get_url_template(self, local_names=None):
         """
-        Generate function for specific method and using specific api
+        Returns the url of the api as a format string, with the url params
+        replaced by format fields, like '/api/hosts/:id' -> '/api/hosts/{id}'
+
+        :param local_names: dict to rename the url params in the template
+        """
+        local_names = local_names or {}
+        return self.params_reg.sub(
+            lambda match: '{%s}' % local_names.get(
+                match.group(1),
+                match.group(1),
+            ),
+            self.url,
+        )
+
+    def _get_func_spec(self, as_global=False):
+        """
+        Gathers all the info needed to generate the function for this api
 
         :param as_global: if set, will use the global function name, instead of
             the class method (usually {resource}_{class_method}) when defining
@@ -203,7 +324,7 @@ class MethodAPIDescription(object):
         """
         keywords = []
         params_def = []
-        params_doc = ""
+        params_doc = []
         original_names = {}
 
         params = dict(
@@ -223,24 +344,24 @@ class MethodAPIDescription(object):
                 }
                 params[param['name']] = param
             else:
-                params[param]['required'] = True
-
-        # split required and non-required params for the definition
-        req_params = []
-        nonreq_params = []
-        for param in six.itervalues(params):
-            if param['required']:
-                req_params.append(param)
-            else:
-                nonreq_params.append(param)
+                # copy it, to avoid modifying the original definitions
+                params[param] = dict(params[param], required=True)
+
+        # required params go first in the definition, as the non-required
+        # ones get a default value (sorting is stable, so the order is kept)
+        ordered_params = sorted(
+            six.itervalues(params),
+            key=lambda param: not param['required'],
+        )
 
-        for param in req_params + nonreq_params:
-            params_doc += self.create_param_doc(param) + "\n"
+        for param in ordered_params:
+            params_doc.append(self.create_param_doc(param) + "\n")
             local_name = param['name']
-            # some params collide with python keywords, that's why we do
-            # this switch (and undo it inside the function we generate)
-            if param['name'] == 'except':
-                local_name = 'except_'
+            # some params collide with python keywords (like except or
+            # async), that's why we do this switch (and undo it inside the
+            # function we generate)
+            if keyword.iskeyword(local_name):
+                local_name += '_'
             original_names[local_name] = param['name']
             keywords.append(local_name)
             if param['required']:
@@ -248,50 +369,151 @@ class MethodAPIDescription(object):
             else:
                 params_def.append("%s=None" % local_name)
 
-        func_head = 'def {0}(self, {1}):'.format(
-            as_global and self.get_global_method_name() or self.name,
-            ', '.join(params_def)
+        func_name = as_global and self.get_global_method_name() or self.name
+        return {
+            'name': func_name,
+            'keywords': keywords,
+            'params_def': params_def,
+            'original_names': original_names,
+            'doc': '\n'.join(
+                ['', self.short_desc, '', ''.join(params_doc), '   ']
+            ),
+            'cache_key': (
+                func_name,
+                self.url,
+                self.http_method,
+                tuple(
+                    (param['name'], param['required'])
+                    for param in ordered_params
+                ),
+            ),
+        }
+
+    def _get_func_source(self, func_spec):
+        """
+        Generates the source code of the function for this api
+
+        :param func_spec: function info, as returned by :func:`_get_func_spec`
+        """
+        original_names = func_spec['original_names']
+        local_names = dict(
+            (original_name, local_name)
+            for local_name, original_name in six.iteritems(original_names)
         )
-        code_body = (
-            '   _vars_ = locals()\n'
-            '   _url = self._fill_url("{url}", _vars_, {url_params})\n'
-            '   _original_names = {original_names}\n'
-            '   _kwargs = dict((_original_names[k], _vars_[k])\n'
-            '                   for k in {keywords} if _vars_[k])\n'
-            '   return self._foreman.do_{http_method}(_url, _kwargs)')
-        code_body = code_body.format(
-            http_method=self.http_method.lower(),
-            url=self.url,
-            url_params=self.url_params,
-            keywords=keywords,
-            original_names=original_names,
+        code = ['def {0}(self, {1}):'.format(
+            func_spec['name'],
+            ', '.join(func_spec['params_def'])
+        )]
+        # the kwargs are built explicitly for each param, so the generated
+        # function does not need to inspect its locals
+        code.append('   _kwargs = {}')
+        for local_name in func_spec['keywords']:
+            code.append(
+                '   if {0} is not None:\n'
+                '      _kwargs[{1!r}] = {0}'.format(
+                    local_name,
+                    original_names[local_name],
+                )
+            )
+        if self.url_params:
+            code.append('   _url = {0!r}.format({1})'.format(
+                self.get_url_template(local_names),
+                ', '.join(
+                    '{0}={0}'.format(local_names[param])
+                    for param in self.url_params
+                ),
+            ))
+        else:
+            code.append('   _url = {0!r}'.format(self.url))
+        code.append(
+            '   return self._foreman.do_{0}(_url, _kwargs)'.format(
+                self.http_method.lower(),
+            )
         )
+        return '\n'.join(code)
 
-        code = [
-            func_head,
-            '   """',
-            self.short_desc,
-            '',
-            params_doc,
-            '   """',
-            code_body,
-        ]
+    def generate_func(self, as_global=False):
+        """
+        Generate function for specific method and using specific api
 
-        code = '\n'.join(code)
+        :param as_global: if set, will use the global function name, instead of
+            the class method (usually {resource}_{class_method}) when defining
+            the function
+        """
+        return self.generate_funcs([self], as_global=as_global)[0]
 
-        six.exec_(code)
+    @classmethod
+    def generate_funcs(cls, apis, as_global=False):
+        """
+        Generate the functions for the given apis, compiling all the ones that
+        were not already generated at once.
 
-        function = locals()[self.name]
-        # to ease debugging, all the funcs have the definitions attached
-        setattr(function, 'defs', self)
-        return function
+        :param apis: list of :class:`MethodAPIDescription` to generate the
+            functions for
+        :param as_global: if set, will use the global function name, instead of
+            the class method (usually {resource}_{class_method}) when defining
+            the function
+        :return: list with the functions for each of the given apis
+        """
+        func_specs = [api._get_func_spec(as_global=as_global) for api in apis]
+
+        # each generated function is stored in _funcs_ right after being
+        # defined, as different functions might share the same name
+        sources = []
+        new_keys = []
+        for api, func_spec in zip(apis, func_specs):
+            cache_key = func_spec['cache_key']
+            if cache_key in _FUNC_CACHE or cache_key in new_keys:
+                continue
+            sources.append(api._get_func_source(func_spec))
+            sources.append('_funcs_[%d] = %s' % (
+                len(new_keys),
+                func_spec['name'],
+            ))
+            new_keys.append(cache_key)
+
+        if sources:
+            code = compile('\n'.join(sources), '<foreman-gen>', 'exec')
+            namespace = {'_funcs_': {}}
+            six.exec_(code, globals(), namespace)
+            for index, cache_key in enumerate(new_keys):
+                _FUNC_CACHE[cache_key] = namespace['_funcs_'][index]
+
+        functions = []
+        for api, func_spec in zip(apis, func_specs):
+            cached_func = _FUNC_CACHE[func_spec['cache_key']]
+            function = types.FunctionType(
+                six.get_function_code(cached_func),
+                six.get_function_globals(cached_func),
+                func_spec['name'],
+                six.get_function_defaults(cached_func),
+            )
+            function.__doc__ = func_spec['doc']
+            # to ease debugging, all the funcs have the definitions attached
+            setattr(function, 'defs', api)
+            functions.append(function)
+        return functions
 
     @classmethod
     def create_param_doc(cls, param, prefix=None):
         """
         Generate documentation for single parameter of function
         :param param: dict contains info about parameter
-        :param sub: prefix string for recursive purposes
+        :param prefix: prefix string for recursive purposes
+        """
+        lines = []
+        cls._add_param_doc_lines(lines, param, prefix)
+        return '\n'.join(lines)
+
+    @classmethod
+    def _add_param_doc_lines(cls, lines, param, prefix=None):
+        """
+        Appends the documentation lines of the given parameter, and its
+        subparameters, to the given list
+
+        :param lines: list to append the lines to
+        :param param: dict contains info about parameter
+        :param prefix: prefix string for recursive purposes
         """
         desc = cls.exclude_html_reg.sub('', param['description']).strip()
         if not desc:
@@ -299,14 +521,51 @@ class MethodAPIDescription(object):
         name = param['name']
         if prefix:
             name = "%s[%s]" % (prefix, name)
-        doc_ = ":param %s: %s; %s" % (name, desc, param['validator'])
-        if param['required']:
-            doc_ += " (REQUIRED)"
-        else:
-            doc_ += " (OPTIONAL)"
+        lines.append(":param %s: %s; %s (%s)" % (
+            name,
+            desc,
+            param['validator'],
+            param['required'] and 'REQUIRED' or 'OPTIONAL',
+        ))
         for param in param.get('params', []):
-            doc_ += "\n" + cls.create_param_doc(param, name)
-        return doc_
+            cls._add_param_doc_lines(lines, param, name)
+
+
+class FrozenFunction(object):
+    """
+    Picklable representation of a generated api function, used to store the
+    compiled api definitions in the local cache.
+    """
+    def __init__(self, function, marshalled_codes=None):
+        """
+        :param function: generated api function to freeze
+        :param marshalled_codes: dict to share the already marshalled code
+            objects between functions
+        """
+        code = six.get_function_code(function)
+        if marshalled_codes is None:
+            marshalled_codes = {}
+        if code not in marshalled_codes:
+            marshalled_codes[code] = marshal.dumps(code)
+        self.code = marshalled_codes[code]
+        self.name = function.__name__
+        self.defaults = six.get_function_defaults(function)
+        self.doc = function.__doc__
+        self.defs = function.defs
+
+    def thaw(self):
+        """
+        Returns the generated api function again
+        """
+        function = types.FunctionType(
+            marshal.loads(self.code),
+            globals(),
+            self.name,
+            self.defaults,
+        )
+        function.__doc__ = self.doc
+        function.defs = self.defs
+        return function
 
 
 def parse_resource_definition(resource_name, resource_dct):
@@ -348,60 +607,78 @@ def parse_resource_definition(resource_name, resource_dct):
                 # might not have parsed {resource} yet
                 functions = foreign_methods.setdefault(api.resource, {})
                 if api.name in functions:
-                    old_api = functions.get(api.name).defs
+                    old_api = functions.get(api.name)
                     # show only in debug the repeated but identical definitions
-                    log_method = logger.warning
+                    log_level = logging.WARNING
                     if api.url == old_api.url:
-                        log_method = logger.debug
-
-                    log_method(
-                        "There is a conflict trying to redefine a method "
-                        "for a foreign resource (%s): \n"
-                        "\tresource:\n"
-                        "\tapipie_resource: %s\n"
-                        "\tnew_api: %s\n"
-                        "\tnew_url: %s\n"
-                        "\told_api: %s\n"
-                        "\told_url: %s",
-                        api.name,
-                        resource_name,
-                        pprint.pformat(api),
-                        api.url,
-                        pprint.pformat(old_api),
-                        old_api.url,
-                    )
+                        log_level = logging.DEBUG
+
+                    # avoid formatting the apis if it's not going to be shown
+                    if logger.isEnabledFor(log_level):
+                        logger.log(
+                            log_level,
+                            "There is a conflict trying to redefine a method "
+                            "for a foreign resource (%s): \n"
+                            "\tresource:\n"
+                            "\tapipie_resource: %s\n"
+                            "\tnew_api: %s\n"
+                            "\tnew_url: %s\n"
+                            "\told_api: %s\n"
+                            "\told_url: %s",
+                            api.name,
+                            resource_name,
+                            pprint.pformat(api),
+                            api.url,
+                            pprint.pformat(old_api),
+                            old_api.url,
+                        )
                     new_dict['_conflicting_methods'].append(api)
                     continue
-                functions[api.name] = api.generate_func()
+                functions[api.name] = api
 
             else:
                 # it's an own method, resource and url match
                 if api.name in new_dict['_own_methods']:
-                    old_api = new_dict.get(api.name).defs
-                    log_method = logger.warning
+                    old_api = new_dict.get(api.name)
+                    log_level = logging.WARNING
                     # show only in debug the repeated but identical definitions
                     if api.url == old_api.url:
-                        log_method = logger.debug
-
-                    log_method(
-                        "There is a conflict trying to redefine method "
-                        "(%s): \n"
-                        "\tapipie_resource: %s\n"
-                        "\tnew_api: %s\n"
-                        "\tnew_url: %s\n"
-                        "\told_api: %s\n"
-                        "\told_url: %s",
-                        api.name,
-                        resource_name,
-                        pprint.pformat(api),
-                        api.url,
-                        pprint.pformat(old_api),
-                        old_api.url,
-                    )
+                        log_level = logging.DEBUG
+
+                    # avoid formatting the apis if it's not going to be shown
+                    if logger.isEnabledFor(log_level):
+                        logger.log(
+                            log_level,
+                            "There is a conflict trying to redefine method "
+                            "(%s): \n"
+                            "\tapipie_resource: %s\n"
+                            "\tnew_api: %s\n"
+                            "\tnew_url: %s\n"
+                            "\told_api: %s\n"
+                            "\told_url: %s",
+                            api.name,
+                            resource_name,
+                            pprint.pformat(api),
+                            api.url,
+                            pprint.pformat(old_api),
+                            old_api.url,
+                        )
                     new_dict['_conflicting_methods'].append(api)
                     continue
                 new_dict['_own_methods'].add(api.name)
-                new_dict[api.name] = api.generate_func()
+                new_dict[api.name] = api
+
+    # generate all the functions of the resource at once, so they are
+    # compiled together
+    apis = [new_dict[name] for name in new_dict['_own_methods']]
+    for functions in six.itervalues(foreign_methods):
+        apis.extend(six.itervalues(functions))
+    for function in MethodAPIDescription.generate_funcs(apis):
+        if function.defs.resource != resource_name:
+            foreign_methods[function.defs.resource][function.defs.name] = \
+                function
+        else:
+            new_dict[function.defs.name] = function
 
     return new_dict, foreign_methods
 
@@ -415,8 +692,11 @@ class ResourceMeta(type):
             return type.__new__(meta, name, bases, data)
 
         # element_name => ElementName
-        cls_name = ''.join([x.capitalize() for x in name.split('_')])
-        return type.__new__(meta, str(cls_name), bases, data)
+        if name not in _CLS_NAME_CACHE:
+            _CLS_NAME_CACHE[name] = str(
+                ''.join([x.capitalize() for x in name.split('_')])
+            )
+        return type.__new__(meta, _CLS_NAME_CACHE[name], bases, data)
 
 
 class Resource(object):
@@ -425,6 +705,9 @@ class Resource(object):
     """
     __metaclass__ = ResourceMeta
     _params_reg = re.compile(":([^/]+)")
+    # methods that are also bound to the foreman object, with the resource
+    # name as suffix, like index_hosts
+    global_methods = ('index', 'show', 'update', 'destroy', 'create')
 
     def __init__(self, foreman):
         """
@@ -433,19 +716,17 @@ class Resource(object):
         self._foreman = foreman
         # Preserve backward compatibility with old interface and declare global
         # methods to access the common methods
-        for method_name in ('index', 'show', 'update', 'destroy', 'create'):
+        res_name = self.__class__.__name__.lower()
+        bindings = {}
+        for method_name in self.global_methods:
             method = getattr(self, method_name, None)
-            method_name = "%s_%s" % (
-                method_name,
-                self.__class__.__name__.lower(),
-            )
             if method:
-                setattr(self._foreman, method_name, method)
+                bindings["%s_%s" % (method_name, res_name)] = method
+        vars(self._foreman).update(bindings)
 
     def _fill_url(self, url, vars_, params):
-        kwargs = dict((k, vars_[k]) for k in params)
-        url = self._params_reg.sub(lambda match: '{%s}' % match.groups(), url)
-        return url.format(**kwargs)
+        # format ignores the extra values, no need to filter them by params
+        return self._params_reg.sub(r'{\1}', url).format(**vars_)
 
 
 class MetaForeman(type):
@@ -463,30 +744,23 @@ class MetaForeman(type):
             'methods': [],
             'full_description': "Binds foreman_plugins",
         }
-        for plugin in (pl for pl in PLUGINS if not pl.startswith('_')):
+        for plugin in VISIBLE_PLUGINS:
             try:
-                myplugin = __import__(
-                    'foreman_plugins.' + plugin,
-                    globals(),
-                    locals(),
-                    ['DEFS'],
-                )
-            except ImportError:
+                plugin_defs = importlib.import_module(
+                    'foreman_plugins.' + plugin
+                ).DEFS
+            except (ImportError, AttributeError):
                 logger.error('Unable to import plugin module %s', plugin)
                 continue
-            for http_method, funcs in six.iteritems(myplugin.DEFS):
+            for http_method, funcs in six.iteritems(plugin_defs):
                 methods = MetaForeman.convert_plugin_def(http_method, funcs)
                 entries['methods'].extend(methods)
 
         def _init(self, foreman):
             super(self.__class__, self).__init__(foreman)
-            for name, value in six.iteritems(self.__class__.__dict__):
-                if isinstance(value, types.FunctionType) and name[0] != '_':
-                    logger.debug(
-                        'Registering plugin method %s',
-                        name,
-                    )
-                    setattr(self._foreman, name, getattr(self, name))
+            for name in self._exported:
+                logger.debug('Registering plugin method %s', name)
+                setattr(self._foreman, name, getattr(self, name))
 
         resource_data, foreigns = parse_resource_definition('plugins', entries)
         # by default, all the methods are detected as foreign, we must manually
@@ -503,6 +777,12 @@ class MetaForeman(type):
             resource_data,
         )
         plugins_cls.__init__ = _init
+        # the plugin methods to bind to the foreman object, collected only
+        # once instead of on each instantiation
+        plugins_cls._exported = tuple(
+            name for name, value in six.iteritems(plugins_cls.__dict__)
+            if isinstance(value, types.FunctionType) and name[0] != '_'
+        )
         attrs['_plugins_resources'] = plugins_cls
         return type.__new__(meta, cls_name, bases, attrs)
 
@@ -552,11 +832,16 @@ class Foreman(object):
     def __init__(self, url, auth=None, version=None, api_version=None,
                  use_cache=True, strict_cache=True, timeout=60,
                  timeout_post=600, timeout_delete=600, timeout_put=None,
-                 verify=False, cache_dir=None):
+                 verify=False, cache_dir=None, lazy=False, cache_gets=False,
+                 cache_gets_ttl=30, cache_gets_size=256,
+                 version_cache_ttl=None):
         """
         :param url: Full url to the foreman server
         :param auth: Tuple with the user and the pass
-        :param version: Foreman version (will autodetect by default)
+        :param version: Foreman version (will autodetect by default, asking
+            the server for each new client, unless version_cache_ttl is set,
+            in which case the detected version is reused until it's that many
+            seconds old)
         :param api_version: Version of the api to use (1 by default)
         :param use_cache: if True, will use local api definitions, if False,
             will try to get them from the remote Foreman instance (it needs
@@ -580,6 +865,21 @@ class Foreman(object):
             False, SSL will not be validated
         :param cache_dir: path to directory used as cache for api definition
             files.
+        :param lazy: if True, the resources will be generated the first time
+            they are accessed, instead of all of them when instantiating the
+            client
+        :param cache_gets: if True, the results of the GET requests will be
+            cached in memory and reused for the same url and parameters until
+            they expire, or any POST, PUT or DELETE request is done. The
+            cached results are shared, so they should not be modified
+        :param cache_gets_ttl: Time in seconds the cached GET results are
+            valid for
+        :param cache_gets_size: Maximum number of GET results to keep cached,
+            the least recently used ones are discarded first
+        :param version_cache_ttl: if set, the autodetected version will be
+            kept in memory and in the cache dir, and reused by this and other
+            processes for that many seconds, instead of asking the server each
+            time
         """
         if api_version is None:
             api_version = 1
@@ -590,6 +890,10 @@ class Foreman(object):
             )
         self.url = url
         self._req_params = {}
+        self._get_cache = OrderedDict() if cache_gets else None
+        self._get_cache_ttl = cache_gets_ttl
+        self._get_cache_size = cache_gets_size
+        self._get_cache_lock = threading.Lock()
         self.timeout = {'DEFAULT': timeout or None}
 
         if timeout_post is not None:
@@ -602,6 +906,27 @@ class Foreman(object):
         self.version = version
         self.api_version = api_version
         self.session = requests.Session()
+        if not OLD_REQ:
+            # keep enough connections alive for concurrent requests, and
+            # retry only the connections that could not be established, so
+            # the error responses still reach the caller as ForemanException
+            # and slow requests are not sent again
+            if Retry is None:
+                max_retries = 3
+            else:
+                max_retries = Retry(
+                    total=3,
+                    connect=3,
+                    read=0,
+                    backoff_factor=0.2,
+                )
+            adapter = HTTPAdapter(
+                pool_connections=32,
+                pool_maxsize=32,
+                max_retries=max_retries,
+            )
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
         self.session.verify = verify
         self._req_params['verify'] = verify
         self.cache_dir = cache_dir or \
@@ -613,10 +938,19 @@ class Foreman(object):
                 'Accept': 'application/json; version=%s' % api_version,
                 'Content-type': 'application/json',
             })
+        if self.version is None and version_cache_ttl:
+            detected_at, version = _SERVER_VERSION_CACHE.get(url, (0, None))
+            if time.time() - detected_at <= version_cache_ttl:
+                self.version = version
+            else:
+                self.version = self._load_version_hint(version_cache_ttl)
         if self.version is None:
             self.version = self.get_foreman_version()
+            if version_cache_ttl:
+                self._dump_version_hint()
+                _SERVER_VERSION_CACHE[url] = (time.time(), self.version)
 
-        self._generate_api_defs(use_cache, strict_cache)
+        self._generate_api_defs(use_cache, strict_cache, lazy=lazy)
         # Instantiate plugins
         self.plugins = self._plugins_resources(self)
 
@@ -657,16 +991,13 @@ class Foreman(object):
         the version first to know its path, so instead of that we get the
         main page and extract the version from the footer.
         """
-        home_page = requests.get(
+        home_page = self.session.get(
             self.url,
             timeout=self.get_timeout('GET'),
             **self._req_params
         )
 
-        match = re.search(
-            r'Version\s+(?P<version>[^\s<]+)?',
-            home_page.text,
-        )
+        match = VERSION_REG.search(home_page.text)
         if match:
             return match.groupdict()['version']
         else:
@@ -677,46 +1008,110 @@ class Foreman(object):
                 **self._req_params
             )
             if res.status_code < 200 or res.status_code >= 300:
-                raise ForemanException(
-                    res,
-                    'Something went wrong:%s' % res_to_str(res)
-                )
+                raise ForemanException(res)
             res = res.json()
             if 'version' in res:
                 return res['version']
             else:
                 raise ForemanVersionException('Unable to get version')
 
+    def _get_version_hint_path(self):
+        return os.path.join(
+            self.cache_dir,
+            'versions',
+            hashlib.sha1(self.url.encode('utf-8')).hexdigest(),
+        )
+
+    def _load_version_hint(self, ttl):
+        """
+        Loads the foreman version stored by a previous client for this url,
+        if any.
+
+        :param ttl: Maximum age in seconds of the stored version
+        :return: the stored version, or None if there's none or it's too old
+        """
+        hint_path = self._get_version_hint_path()
+        try:
+            if time.time() - os.path.getmtime(hint_path) > ttl:
+                logger.debug('Outdated version hint %s', hint_path)
+                return None
+            with open(hint_path) as hint_fd:
+                return hint_fd.read().strip() or None
+        except (IOError, OSError):
+            return None
+
+    def _dump_version_hint(self):
+        """
+        Stores the current foreman version for this url, so other clients
+        don't have to ask the server for it.
+        """
+        hint_path = self._get_version_hint_path()
+        try:
+            if not os.path.exists(os.path.dirname(hint_path)):
+                os.makedirs(os.path.dirname(hint_path))
+            tmp_path = '%s.%d.tmp' % (hint_path, os.getpid())
+            with open(tmp_path, 'w') as hint_fd:
+                hint_fd.write(self.version)
+            os.rename(tmp_path, hint_path)
+        except Exception as exc:
+            logger.debug('Unable to write version hint %s: %s', hint_path,
+                         exc)
+
     def _get_local_defs(self, strict=True):
         """
         Gets the cached definition or the any previous from the same major
         version if not strict passed.
 
+        :param strict: Use any version that shared major version and has lower
+             minor version if no total match found
+        """
+        defs_path = self._find_local_defs(strict=strict)
+        # the parsed definitions are only read, so they can be shared by all
+        # the clients while the file does not change
+        mtime = os.path.getmtime(defs_path)
+        cached_mtime, data = _LOCAL_DEFS_CACHE.get(defs_path, (None, None))
+        if cached_mtime != mtime:
+            data = load_json(defs_path)
+            _LOCAL_DEFS_CACHE[defs_path] = (mtime, data)
+        return data
+
+    def _find_local_defs(self, strict=True):
+        """
+        Gets the path to the cached definition or the any previous from the
+        same major version if not strict passed.
+
         :param strict: Use any version that shared major version and has lower
              minor version if no total match found
         """
         version = parse_version(self.version)
+        suffix = '-v%s.json' % self.api_version
+        files = []
+        last_major_match = None
+        last_major_version = None
         for cache_dir in [
             self.cache_dir,
             os.path.join(os.path.expanduser('~'), '.python-foreman'),
             os.path.dirname(__file__)
         ]:
             defs_path = os.path.join(cache_dir, 'definitions')
-            files = glob.glob('%s/*-v%s.json' % (defs_path, self.api_version))
-            files_version = [
-                (fn, parse_version(os.path.basename(fn).rsplit('-', 1)[0]))
-                for fn in files
-            ]
+            if not os.path.isdir(defs_path):
+                continue
 
-            last_major_match = None
-            for f_name, f_ver in sorted(files_version, key=lambda x: x[1]):
+            for f_basename in os.listdir(defs_path):
+                if not f_basename.endswith(suffix):
+                    continue
+                f_name = os.path.join(defs_path, f_basename)
+                files.append(f_name)
+                f_ver = parse_version(f_basename.rsplit('-', 1)[0])
                 if f_ver == version:
                     logger.debug('Found local cached version %s' % f_name)
-                    return json.loads(open(f_name).read())
-                if f_ver[:2] == version[:2]:
+                    return f_name
+                # keep the newest one of the same major and minor version
+                if f_ver[:2] == version[:2] and (
+                    last_major_version is None or f_ver > last_major_version
+                ):
                     last_major_match = f_name
-                if f_ver[0] > version[0]:
-                    break
+                    last_major_version = f_ver
 
         if last_major_match:
             if strict:
@@ -731,7 +1126,7 @@ class Foreman(object):
                     last_major_match,
                     self.version,
                 )
-                return json.loads(open(last_major_match).read())
+                return last_major_match
         raise ForemanVersionException(
             "No suitable cache found for version=%s api_version=%s strict=%s."
             "\nAvailable: %s"
@@ -743,36 +1138,72 @@ class Foreman(object):
             )
         )
 
-    def _get_remote_defs(self):
+    def _request_remote_defs(self, stream=False):
         """
-        Retrieves the json definitions from remote foreman instance.
+        Requests the json definitions to the remote foreman instance.
+
+        :param stream: If True, the body will be downloaded when iterating
+            over it, instead of when doing the request
         """
-        res = self.session.get(
+        params = {'stream': True} if stream and not OLD_REQ else {}
+        params.update(self._req_params)
+        return self.session.get(
             '%s/%s' % (self.url, 'apidoc/v%s.json' % self.api_version),
             timeout=self.get_timeout('GET'),
-            **self._req_params
+            **params
         )
 
+    def _get_remote_defs(self):
+        """
+        Retrieves the json definitions from remote foreman instance.
+        """
+        res = self._request_remote_defs(stream=True)
         if res.ok:
-            data = json.loads(res.text)
             defs_path = os.path.join(self.cache_dir, 'definitions')
-
-            if not os.path.exists(defs_path):
-                try:
-                    os.makedirs(defs_path)
-                except Exception:
-                    logger.debug('Unable to create cache dir %s', defs_path)
-                    return data
             cache_fn = '%s/%s-v%s.json' % (
                 defs_path, self.version,
                 self.api_version,
             )
+            tmp_fn = '%s.%d.tmp' % (cache_fn, os.getpid())
             try:
-                with open(cache_fn, 'w') as cache_fd:
-                    cache_fd.write(json.dumps(data, indent=4, default=str))
-                    logger.debug('Wrote cache file %s', cache_fn)
+                if not os.path.exists(defs_path):
+                    os.makedirs(defs_path)
+                cache_fd = open(tmp_fn, 'wb')
             except Exception:
                 logger.debug('Unable to write cache file %s', cache_fn)
+                if orjson is not None:
+                    return orjson.loads(res.content)
+                return json.loads(res.text)
+
+            # write the definitions to the cache as they arrive, instead of
+            # keeping the whole body and its parsed copy in memory
+            try:
+                with cache_fd:
+                    for chunk in res.iter_content(chunk_size=64 * 1024):
+                        cache_fd.write(chunk)
+            except Exception as exc:
+                logger.debug('Unable to write cache file %s: %s', cache_fn,
+                             exc)
+                try:
+                    os.remove(tmp_fn)
+                except OSError:
+                    pass
+                # the streamed body is already consumed, so get it again to
+                # parse it in memory
+                res = self._request_remote_defs()
+                if not res.ok:
+                    raise ForemanException(res)
+                if orjson is not None:
+                    return orjson.loads(res.content)
+                return json.loads(res.text)
+
+            try:
+                data = load_json(tmp_fn)
+            except Exception:
+                os.remove(tmp_fn)
+                raise
+            os.rename(tmp_fn, cache_fn)
+            logger.debug('Wrote cache file %s', cache_fn)
         else:
             if res.status_code == 404:
                 logger.warn(
@@ -802,7 +1233,105 @@ class Foreman(object):
             data = self._get_remote_defs()
         return data
 
-    def _generate_api_defs(self, use_cache=True, strict_cache=True):
+    def _get_defs_cache_path(self):
+        return os.path.join(
+            self.cache_dir,
+            'definitions',
+            '%s-v%s.pyc-cache' % (self.version, self.api_version),
+        )
+
+    def _get_defs_cache_header(self, defs_path):
+        """
+        Returns the header that identifies a compiled definitions cache, if
+        any of its values changes, the cache is discarded.
+
+        :param defs_path: path to the json definitions file the cache was
+            generated from
+        """
+        return {
+            'source': defs_path,
+            'source_mtime': os.path.getmtime(defs_path),
+            'client_mtime': os.path.getmtime(__file__),
+            'python': sys.version,
+        }
+
+    def _load_defs_cache(self, strict_cache=True):
+        """
+        Loads the already parsed and compiled api definitions from the local
+        cache, if they are up to date with the json definitions file.
+
+        :param strict_cache: If True, will not accept a similar version cached
+            definitions file as valid
+        :return: the resource definitions, or None if there's no valid cache
+        """
+        cache_path = self._get_defs_cache_path()
+        if not os.path.exists(cache_path):
+            return None
+
+        try:
+            defs_path = self._find_local_defs(strict=strict_cache)
+            with open(cache_path, 'rb') as cache_fd:
+                header = pickle.load(cache_fd)
+                if header != self._get_defs_cache_header(defs_path):
+                    logger.debug('Outdated compiled cache %s', cache_path)
+                    return None
+                frozen_defs = pickle.load(cache_fd)
+        except Exception as exc:
+            logger.debug('Unable to load compiled cache %s: %s', cache_path,
+                         exc)
+            return None
+
+        logger.debug('Using compiled cache %s', cache_path)
+        return dict(
+            (res_name, dict(
+                (key, value.thaw() if isinstance(value, FrozenFunction)
+                 else value)
+                for key, value in six.iteritems(res_data)
+            ))
+            for res_name, res_data in six.iteritems(frozen_defs)
+        )
+
+    def _dump_defs_cache(self, resource_defs, strict_cache=True):
+        """
+        Stores the parsed and compiled api definitions in the local cache, so
+        next instances don't have to generate them again.
+
+        :param resource_defs: resource definitions as returned by
+            :func:`_parse_api_defs`
+        :param strict_cache: If True, will not accept a similar version cached
+            definitions file as valid
+        """
+        cache_path = self._get_defs_cache_path()
+        # functions sharing the same code object are marshalled only once
+        marshalled_codes = {}
+        frozen_defs = dict(
+            (res_name, dict(
+                (key, FrozenFunction(value, marshalled_codes)
+                 if isinstance(value, types.FunctionType) else value)
+                for key, value in six.iteritems(res_data)
+            ))
+            for res_name, res_data in six.iteritems(resource_defs)
+        )
+        try:
+            header = self._get_defs_cache_header(
+                self._find_local_defs(strict=strict_cache)
+            )
+            if not os.path.exists(os.path.dirname(cache_path)):
+                os.makedirs(os.path.dirname(cache_path))
+            # write it to a temporary file and move it in place after, so
+            # other clients never load a partially written cache
+            tmp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+            with open(tmp_path, 'wb') as cache_fd:
+                pickle.dump(header, cache_fd, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(frozen_defs, cache_fd, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_path, cache_path)
+            logger.debug('Wrote compiled cache %s', cache_path)
+        except Exception as exc:
+            logger.debug('Unable to write compiled cache %s: %s', cache_path,
+                         exc)
+
+    def _generate_api_defs(self, use_cache=True, strict_cache=True,
+                           lazy=False):
         """
         This method populates the class with the api definitions.
 
@@ -811,12 +1340,197 @@ class Foreman(object):
             try to get the closest one from the local cached
         :param strict_cache: If True, will not accept a similar version cached
             definitions file as valid
+        :param lazy: If True, will only prepare the resources to be generated
+            when first accessed (see :func:`__getattr__`)
+        """
+        resource_defs = None
+        if use_cache and not lazy:
+            resource_classes = _RESOURCE_CLASS_CACHE.get(
+                self._get_resource_classes_key(strict_cache)
+            )
+            if resource_classes is not None:
+                for resource_name, resource_cls in six.iteritems(
+                    resource_classes
+                ):
+                    setattr(self, resource_name, resource_cls(self))
+                return
+
+        if use_cache:
+            resource_defs = self._load_defs_cache(strict_cache=strict_cache)
+
+        if resource_defs is None:
+            data = self._get_defs(use_cache, strict_cache=strict_cache)
+            resources = data["docs"]["resources"]
+            if lazy:
+                # the compiled cache is not written here, as only the
+                # resources that are accessed get generated
+                self._resource_factories = self._get_resource_factories(
+                    resources,
+                )
+                return
+            resource_defs = self._parse_api_defs(six.iteritems(resources))
+            if use_cache:
+                self._dump_defs_cache(
+                    resource_defs,
+                    strict_cache=strict_cache,
+                )
+
+        if lazy:
+            self._resource_factories = dict(
+                (resource_name, lambda data=resource_data: data)
+                for resource_name, resource_data in six.iteritems(
+                    resource_defs
+                )
+            )
+            return
+
+        # Finally create the resource classes for all the collected resources
+        # instantiate and bind them to this class
+        resource_classes = {}
+        for resource_name, resource_data in six.iteritems(resource_defs):
+            instance = self._bind_resource(resource_name, resource_data)
+            if instance is not None:
+                resource_classes[resource_name] = instance.__class__
+
+        # the classes don't hold any client state, so they can be reused by
+        # any other client with the same definitions
+        if use_cache:
+            cache_key = self._get_resource_classes_key(strict_cache)
+            if cache_key is not None:
+                _RESOURCE_CLASS_CACHE[cache_key] = resource_classes
+
+    def _get_resource_classes_key(self, strict_cache):
+        """
+        Returns the key to cache the generated resource classes in the
+        current process, or None if they should not be cached. It's based on
+        the compiled definitions cache and on the json definitions it was
+        generated from, so changing any of them generates the classes again.
+
+        :param strict_cache: If True, will not accept a similar version cached
+            definitions file as valid
+        """
+        cache_path = self._get_defs_cache_path()
+        try:
+            header = self._get_defs_cache_header(
+                self._find_local_defs(strict=strict_cache)
+            )
+            return (
+                cache_path,
+                os.path.getmtime(cache_path),
+                strict_cache,
+                tuple(sorted(header.items())),
+            )
+        except (OSError, ForemanVersionException):
+            return None
+
+    def _bind_resource(self, resource_name, resource_data):
         """
-        data = self._get_defs(use_cache, strict_cache=strict_cache)
+        Creates the class for the given resource, and binds an instance of it
+        to this object.
 
+        :param resource_name: Name of the resource
+        :param resource_data: Resource class data, as returned by
+            :func:`_parse_api_defs`
+        :return: the resource instance, or None if the resource has no methods
+        """
+        new_resource = ResourceMeta.__new__(
+            ResourceMeta,
+            str(resource_name),
+            (Resource,),
+            resource_data,
+        )
+        if not resource_data['_own_methods']:
+            logger.debug('Skipping empty resource %s' % resource_name)
+            return None
+        instance = new_resource(self)
+        setattr(self, resource_name, instance)
+        return instance
+
+    def _get_resource_factories(self, resources):
+        """
+        Returns a factory for each resource that can be generated from the
+        given definitions, that parses only the definitions that add methods
+        to that resource.
+
+        :param resources: resources section of the apipie json
+        """
+        sources = {}
+        for res_name, res_dct in six.iteritems(resources):
+            sources.setdefault(res_name, set()).add(res_name)
+            for method in res_dct['methods']:
+                for api in method['apis']:
+                    f_res_name = MethodAPIDescription.parse_resource_from_url(
+                        api['api_url']
+                    ) or ''
+                    if f_res_name != res_name.lower():
+                        sources.setdefault(f_res_name, set()).add(res_name)
+
+        def factory(resource_name, res_names):
+            # keep the original order, as it defines which method wins when
+            # there are conflicts
+            resource_defs = self._parse_api_defs(
+                (res_name, res_dct)
+                for res_name, res_dct in six.iteritems(resources)
+                if res_name in res_names
+            )
+            return resource_defs[resource_name]
+
+        return dict(
+            (
+                resource_name,
+                lambda name=resource_name, names=res_names: factory(
+                    name,
+                    names,
+                ),
+            )
+            for resource_name, res_names in six.iteritems(sources)
+        )
+
+    def __getattr__(self, name):
+        """
+        Generates the resources on demand when the client was created with
+        the lazy flag, including the old style global methods for them (like
+        index_hosts).
+        """
+        factories = self.__dict__.get('_resource_factories')
+        if not factories:
+            raise AttributeError(name)
+
+        method_name, _, cls_name = name.partition('_')
+        if name in factories:
+            resource_names = [name]
+        elif method_name in Resource.global_methods:
+            # element_name => elementname, as done by the Resource class
+            resource_names = [
+                resource_name
+                for resource_name in factories
+                if resource_name.replace('_', '').lower() == cls_name
+            ]
+        else:
+            resource_names = []
+
+        for resource_name in resource_names:
+            # the factory is only dropped once the resource is bound, so it
+            # can be retried if anything fails
+            resource_data = factories[resource_name]()
+            self._bind_resource(resource_name, resource_data)
+            del factories[resource_name]
+
+        if name in self.__dict__:
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+    def _parse_api_defs(self, resources):
+        """
+        Parses the json api definitions into the data of the resource classes
+        to generate.
+
+        :param resources: iterable of (name, definition) pairs of the
+            resources section of the apipie json
+        """
         resource_defs = {}
         # parse all the defs first, as they may define methods cross-resource
-        for res_name, res_dct in six.iteritems(data["docs"]["resources"]):
+        for res_name, res_dct in resources:
             new_resource, extra_foreign_methods = parse_resource_definition(
                 res_name.lower(),
                 res_dct,
@@ -826,26 +1540,25 @@ class Foreman(object):
             # overwrites any methods
             if res_name in resource_defs:
                 old_res = resource_defs[res_name]
-                for prop_name, prop_val in six.iteritems(new_resource):
-                    if (
-                        prop_name == '_own_methods' and
-                        prop_name in new_resource
-                    ):
-                        old_res[prop_name].union(prop_val)
-                        continue
-                    # skip internal/private/magic methods
-                    if prop_name.startswith('_'):
-                        continue
-                    if prop_name in old_res:
-                        logger.warning(
-                            "There is conflict trying to redefine method "
-                            "(%s) with foreign method: \n"
-                            "\tapipie_resource: %s\n",
-                            prop_name,
-                            res_name,
-                        )
-                        continue
-                    old_res[prop_name] = prop_val
+                old_res['_own_methods'].update(new_resource['_own_methods'])
+                # skip internal/private/magic methods
+                new_props = set(
+                    prop_name for prop_name in new_resource
+                    if not prop_name.startswith('_')
+                )
+                conflicts = new_props.intersection(old_res)
+                for prop_name in sorted(conflicts):
+                    logger.warning(
+                        "There is conflict trying to redefine method "
+                        "(%s) with foreign method: \n"
+                        "\tapipie_resource: %s\n",
+                        prop_name,
+                        res_name,
+                    )
+                old_res.update(
+                    (prop_name, new_resource[prop_name])
+                    for prop_name in new_props - conflicts
+                )
             else:
                 resource_defs[res_name] = new_resource
 
@@ -856,34 +1569,22 @@ class Foreman(object):
                     f_res_name,
                     {'_own_methods': set()},
                 )
+                conflicts = set(f_methods).intersection(methods)
+                for f_mname in sorted(conflicts):
+                    logger.warning(
+                        "There is conflict trying to redefine method "
+                        "(%s) with foreign method: \n"
+                        "\tapipie_resource: %s\n",
+                        f_mname,
+                        f_res_name,
+                    )
+                new_mnames = set(f_methods) - conflicts
+                methods.update(
+                    (f_mname, f_methods[f_mname]) for f_mname in new_mnames
+                )
+                methods['_own_methods'].update(new_mnames)
 
-                for f_mname, f_method in six.iteritems(f_methods):
-                    if f_mname in methods:
-                        logger.warning(
-                            "There is conflict trying to redefine method "
-                            "(%s) with foreign method: \n"
-                            "\tapipie_resource: %s\n",
-                            f_mname,
-                            f_res_name,
-                        )
-                        continue
-                    methods[f_mname] = f_method
-                    methods['_own_methods'].add(f_mname)
-
-        # Finally ceate the resource classes for all the collected resources
-        # instantiate and bind them to this class
-        for resource_name, resource_data in six.iteritems(resource_defs):
-            new_resource = ResourceMeta.__new__(
-                ResourceMeta,
-                str(resource_name),
-                (Resource,),
-                resource_data,
-            )
-            if not resource_data['_own_methods']:
-                logger.debug('Skipping empty resource %s' % resource_name)
-                continue
-            instance = new_resource(self)
-            setattr(self, resource_name, instance)
+        return resource_defs
 
     def _process_request_result(self, res):
         """Generic function to process the result of an HTTP request"""
@@ -892,64 +1593,103 @@ class Foreman(object):
                 return []
             elif res.status_code == 406:
                 raise Unacceptable(res, None)
-            raise ForemanException(
-                res,
-                'Something went wrong:%s' % res_to_str(res)
-            )
+            raise ForemanException(res)
         try:
-            return OLD_REQ and res.json or res.json()
+            return _response_json(res)
         except ValueError:
             return res.text
 
-    def do_get(self, url, kwargs):
+    def _do_request(self, method, url, **kwargs):
         """
+        Does the request through the session and processes its result.
+
+        :param method: Request method (eg. GET, POST, ..)
         :param url: relative url to resource
-        :param kwargs: parameters for the api call
+        :param kwargs: extra keyword arguments for the session request
         """
-        res = self.session.get(
-            '%s%s' % (self.url, url),
-            params=kwargs,
-            timeout=self.get_timeout('GET'),
-            **self._req_params
+        kwargs.update(self._req_params)
+        res = self.session.request(
+            method,
+            self.url + url,
+            timeout=self.get_timeout(method),
+            **kwargs
         )
         return self._process_request_result(res)
 
+    def do_get(self, url, kwargs):
+        """
+        :param url: relative url to resource
+        :param kwargs: parameters for the api call
+        """
+        if self._get_cache is None:
+            return self._do_request('GET', url, params=kwargs)
+
+        key = (url, json.dumps(kwargs, sort_keys=True, default=str))
+        with self._get_cache_lock:
+            timestamp, result = self._get_cache.pop(key, (0, None))
+            if time.time() - timestamp < self._get_cache_ttl:
+                # re-insert it to keep it as the most recently used
+                self._get_cache[key] = (timestamp, result)
+                return result
+
+        result = self._do_request('GET', url, params=kwargs)
+        with self._get_cache_lock:
+            self._get_cache[key] = (time.time(), result)
+            while len(self._get_cache) > self._get_cache_size:
+                self._get_cache.popitem(last=False)
+        return result
+
+    def clear_get_cache(self):
+        """
+        Discards all the cached GET results, if the GET cache is enabled.
+        """
+        if self._get_cache is not None:
+            with self._get_cache_lock:
+                self._get_cache.clear()
+
+    def do_get_many(self, calls, max_workers=8):
+        """
+        Does several GET requests concurrently, sharing the client session.
+
+        :param calls: iterable of (url, kwargs) tuples, as passed to
+            :func:`do_get`
+        :param max_workers: maximum number of requests to do at the same time
+        :return: list with the result of each request, in the same order
+
+        On python 2 the requests are done one after the other, unless the
+        futures backport is installed.
+        """
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+        except ImportError:
+            return [self.do_get(*call) for call in calls]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(
+                lambda call: self.do_get(*call),
+                calls,
+            ))
+
     def do_post(self, url, kwargs):
         """
         :param url: relative url to resource
         :param kwargs: parameters for the api call
         """
-        data = json.dumps(kwargs)
-        res = self.session.post(
-            '%s%s' % (self.url, url),
-            data=data,
-            timeout=self.get_timeout('POST'),
-            **self._req_params
-        )
-        return self._process_request_result(res)
+        self.clear_get_cache()
+        return self._do_request('POST', url, data=dump_json(kwargs))
 
     def do_put(self, url, kwargs):
         """
         :param url: relative url to resource
         :param kwargs: parameters for the api call
         """
-        data = json.dumps(kwargs)
-        res = self.session.put(
-            '%s%s' % (self.url, url),
-            data=data,
-            timeout=self.get_timeout('PUT'),
-            **self._req_params
-        )
-        return self._process_request_result(res)
+        self.clear_get_cache()
+        return self._do_request('PUT', url, data=dump_json(kwargs))
 
     def do_delete(self, url, kwargs):
         """
         :param url: relative url to resource
         :param kwargs: parameters for the api call
         """
-        res = self.session.delete(
-            '%s%s' % (self.url, url),
-            timeout=self.get_timeout('DELETE'),
-            **self._req_params
-        )
-        return self._process_request_result(res)
+        self.clear_get_cache()
+        return self._do_request('DELETE', url)
@@ -33,11 +33,10 @@ repository.
 from __future__ import print_function
 
 import argparse
-import copy
-import os
 import re
 import sys
-from collections import OrderedDict, defaultdict
+import textwrap
+from collections import defaultdict, deque
 
 import dulwich.repo
 import dulwich.walk
@@ -48,13 +47,37 @@ BUG_URL_REG = re.compile(
 )
 BUGTRACKER_URL = 'http://github.com/inspirehep/' + PROJECT_NAME
 VALID_TAG = re.compile(r'^\d+\.\d+(\.\d+)?$')
+# these match against the raw commit message bytes, to avoid decoding every
+# message when looking for the commit type
 FEAT_HEADER = re.compile(
-    r'\nsem-ver:\s*.*(feature|deprecat).*\n',
+    br'\nsem-ver:\s*.*(feature|deprecat).*\n',
     flags=re.IGNORECASE,
 )
-FEAT_INVENIO = re.compile(r'\n\* NEW')
-MAJOR_HEADER = re.compile(r'\nsem-ver:\s*.*break.*\n', flags=re.IGNORECASE)
-MAJOR_INVENIO = re.compile(r'\n\* INCOMPATIBLE')
+FEAT_INVENIO = re.compile(br'\n\* NEW')
+MAJOR_HEADER = re.compile(
+    br'\nsem-ver:\s*.*break.*\n',
+    flags=re.IGNORECASE,
+)
+MAJOR_INVENIO = re.compile(br'\n\* INCOMPATIBLE')
+
+# shared by all the fit_to_cols calls, the wrapping options are set on each
+WRAPPER = textwrap.TextWrapper(break_long_words=True, break_on_hyphens=False)
+
+# already opened repos, by path
+_REPO_CACHE = {}
+# already loaded commits, by sha, they are immutable so it's safe to share
+# them between the different history walks
+_COMMIT_CACHE = {}
+# already decoded commit messages, by commit sha
+_MESSAGE_CACHE = {}
+# versions of the first parent commits, by repo path and head sha
+_VERSIONS_CACHE = {}
+
+
+def open_repo(repo_path):
+    if repo_path not in _REPO_CACHE:
+        _REPO_CACHE[repo_path] = dulwich.repo.Repo(repo_path)
+    return _REPO_CACHE[repo_path]
 
 
 def get_repo_object(repo, object_name):
@@ -63,202 +86,234 @@ def get_repo_object(repo, object_name):
     except Exception:
         pass
 
-    return repo.get_object(object_name)
+    if object_name not in _COMMIT_CACHE:
+        _COMMIT_CACHE[object_name] = repo.get_object(object_name)
+    return _COMMIT_CACHE[object_name]
+
+
+def get_message(commit):
+    if commit.id not in _MESSAGE_CACHE:
+        _MESSAGE_CACHE[commit.id] = commit.message.decode('utf-8')
+    return _MESSAGE_CACHE[commit.id]
 
 
 def fit_to_cols(what, indent, cols=79):
-    lines = []
-    free_cols = cols - len(indent)
-    while len(what) > free_cols and ' ' in what.lstrip():
-        cutpoint = free_cols
-        extra_indent = ''
-        if what[free_cols] != ' ':
-            try:
-                prev_space = what[:free_cols].rindex(' ')
-                lines.append(indent + what[:prev_space])
-                cutpoint = prev_space + 1
-                extra_indent = '          '
-            except ValueError:
-                lines.append(indent + what[:free_cols] + '-')
-        else:
-            lines.append(indent + what[:free_cols])
-        what = extra_indent + what[cutpoint:]
-    lines.append(indent + what)
-    return '\n'.join(lines)
+    WRAPPER.width = cols
+    WRAPPER.initial_indent = indent
+    WRAPPER.subsequent_indent = indent + ' ' * 10
+    return '\n'.join(WRAPPER.wrap(what))
 
 
 def get_github_from_commit_msg(commit_msg):
-    bugs = []
-    for line in commit_msg.split(b'\n'):
-        match = BUG_URL_REG.match(line.decode('utf-8'))
-        if match:
-            bugs.append(match.groupdict()['bugid'])
-    return ' '.join(bugs)
+    """
+    Args:
+        commit_msg (str): already decoded commit message
+
+    Returns:
+        str: space separated ids of the bugs referenced in the message
+    """
+    return ' '.join(
+        match.group('bugid')
+        for match in (
+            BUG_URL_REG.match(line) for line in commit_msg.split('\n')
+        )
+        if match
+    )
 
 
 def pretty_commit(commit, version=None, commit_type='bug'):
-    message = commit.message.decode('utf-8')  # noqa
-    subject = commit.message.split(b'\n', 1)[0]  # noqa
-    short_hash = commit.sha().hexdigest()[:8]  # noqa
-    author = commit.author  # noqa
-    bugs = get_github_from_commit_msg(commit.message)
+    subject = commit.message.split(b'\n', 1)[0]
+    short_hash = commit.sha().hexdigest()[:8]
+    bugs = get_github_from_commit_msg(get_message(commit))
     if bugs:
-        bugtracker_url = BUGTRACKER_URL + '/issue/'  # noqa
         changelog_bugs = fit_to_cols(
-            'FIXED ISSUES: {bugtracker_url}{bugs}'.format(**vars()),
+            'FIXED ISSUES: %s/issue/%s' % (BUGTRACKER_URL, bugs),
             indent='    ',
         ) + '\n'
     else:
-        changelog_bugs = ''  # noqa
+        changelog_bugs = ''
 
-    feature_header = ''
     if commit_type == 'feature':
         feature_header = 'FEATURE'
     elif commit_type == 'api_break':
         feature_header = 'MAJOR'
     else:
-        feature_header = 'MINOR'  # noqa
+        feature_header = 'MINOR'
 
-    changelog_message = fit_to_cols(  # noqa
-        '{feature_header} {short_hash}: {subject}'.format(**vars()),
+    changelog_message = fit_to_cols(
+        '%s %s: %s' % (feature_header, short_hash, subject),
         indent='    ',
     )
 
-    return (
-        (
-            '* {version} "{author}"\n'
-            if version is not None else ''
-        ) + '{changelog_message}\n' + '{changelog_bugs}'
-    ).format(**vars())
-
+    if version is not None:
+        header = '* %s "%s"\n' % (version, commit.author)
+    else:
+        header = ''
+    return header + changelog_message + '\n' + changelog_bugs
 
-def get_tags(repo):
-    return {
-        commit: os.path.basename(tag_ref)
-        for tag_ref, commit in repo.get_refs().items()
-        if tag_ref.startswith(b'refs/tags/') and VALID_TAG.match(
-            tag_ref[len('refs/tags/'):].decode()
-        )
-    }
 
+def load_refs(repo):
+    """
+    Reads all the refs of the repo once, and classifies them.
 
-def get_refs(repo):
+    Returns:
+        tuple(dict, dict): the (major, feature) version of the tag per commit
+            sha, and the set of refs per commit sha
+    """
+    tags = {}
     refs = defaultdict(set)
     for ref, commit in repo.get_refs().items():
-        refs[commit].add(commit)
         refs[commit].add(ref)
-    return refs
+        if not ref.startswith(b'refs/tags/'):
+            continue
+        tag_name = ref[len('refs/tags/'):].decode()
+        if VALID_TAG.match(tag_name):
+            maj_version, feat_version = tag_name.split('.')[:2]
+            tags[commit] = (int(maj_version), int(feat_version))
+    return tags, refs
 
 
-def fuzzy_matches_ref(fuzzy_ref, ref):
-    cur_section = ''
-    for path_section in reversed(ref.split(b'/')):
-        cur_section = os.path.normpath(os.path.join(path_section, cur_section))
-        if fuzzy_ref == cur_section:
-            return True
-    return False
+def get_tags(repo):
+    return load_refs(repo)[0]
 
 
-def fuzzy_matches_refs(fuzzy_ref, refs):
-    return any(fuzzy_matches_ref(fuzzy_ref, ref) for ref in refs)
+def get_refs(repo):
+    return load_refs(repo)[1]
 
 
-def get_children_per_parent(repo_path):
-    repo = dulwich.repo.Repo(repo_path)
-    children_per_parent = defaultdict(set)
+def fuzzy_matches_ref(fuzzy_ref, ref):
+    """
+    Args:
+        fuzzy_ref (bytes): trailing path sections of a ref, like ``b'1.2'`` or
+            ``b'tags/1.2'``
+        ref (bytes): full ref name
 
-    for entry in repo.get_walker(order=dulwich.walk.ORDER_TOPO):
-        for parent in entry.commit.parents:
-            children_per_parent[parent].add(entry.commit.sha().hexdigest())
+    Returns:
+        bool: whether the ref is, or ends with, the given sections
+    """
+    return ref == fuzzy_ref or ref.endswith(b'/' + fuzzy_ref)
 
-    return children_per_parent
 
+def fuzzy_matches_refs(fuzzy_ref, refs):
+    suffix = b'/' + fuzzy_ref
+    return any(ref == fuzzy_ref or ref.endswith(suffix) for ref in refs)
 
-def get_first_parents(repo_path):
-    repo = dulwich.repo.Repo(repo_path)
+
+def walk_history(repo_path):
+    """
+    Walks the whole history once, collecting both the first parents and the
+    children of each commit.
+
+    Returns:
+        tuple(list, dict): first parent shas, in topological order, and the
+            set of children shas per parent sha
+    """
+    repo = open_repo(repo_path)
+    children_per_parent = defaultdict(set)
     #: these are the commits that are parents of more than one other commit
     first_parents = []
+    # same as first_parents, for fast lookups
+    first_parents_set = set()
     on_merge = False
 
+    def add_first_parent(sha):
+        if sha not in first_parents_set:
+            first_parents_set.add(sha)
+            first_parents.append(sha)
+
     for entry in repo.get_walker(order=dulwich.walk.ORDER_TOPO):
         commit = entry.commit
+        _COMMIT_CACHE.setdefault(commit.id, commit)
+        commit_sha = commit.sha().hexdigest()
+        for parent in commit.parents:
+            children_per_parent[parent].add(commit_sha)
+
         # In order to properly work on python 2 and 3 we need some utf magic
         parents = commit.parents and [i.decode('utf-8') for i in
                                       commit.parents]
         if not parents:
-            if commit.sha().hexdigest() not in first_parents:
-                first_parents.append(commit.sha().hexdigest())
+            add_first_parent(commit_sha)
         elif len(parents) == 1 and not on_merge:
-            if commit.sha().hexdigest() not in first_parents:
-                first_parents.append(commit.sha().hexdigest())
-            if parents[0] not in first_parents:
-                first_parents.append(parents[0])
+            add_first_parent(commit_sha)
+            add_first_parent(parents[0])
         elif len(parents) > 1 and not on_merge:
             on_merge = True
-            if commit.sha().hexdigest() not in first_parents:
-                first_parents.append(commit.sha().hexdigest())
-            if parents[0] not in first_parents:
-                first_parents.append(parents[0])
-        elif parents and commit.sha().hexdigest() in first_parents:
-            if parents[0] not in first_parents:
-                first_parents.append(parents[0])
+            add_first_parent(commit_sha)
+            add_first_parent(parents[0])
+        elif parents and commit_sha in first_parents_set:
+            add_first_parent(parents[0])
+
+    return first_parents, children_per_parent
 
-    return first_parents
 
+def get_children_per_parent(repo_path):
+    return walk_history(repo_path)[1]
 
-def has_firstparent_child(sha, first_parents, parents_per_child):
+
+def get_first_parents(repo_path):
+    return walk_history(repo_path)[0]
+
+
+def has_firstparent_child(sha, first_parents_set, parents_per_child):
     return any(
-        child for child in parents_per_child[sha] if child in first_parents
+        child for child in parents_per_child[sha] if child in first_parents_set
     )
 
 
-def get_merged_commits(repo, commit, first_parents, children_per_parent):
+def get_merged_commits(repo, commit, first_parents_set, children_per_parent):
     merge_children = set()
+    explored = set()
 
-    to_explore = set([commit.sha().hexdigest()])
+    to_explore = deque([commit.sha().hexdigest()])
 
     while to_explore:
-        next_sha = to_explore.pop()
+        next_sha = to_explore.popleft()
+        # commits reachable through several paths are explored only once
+        if next_sha in explored:
+            continue
+        explored.add(next_sha)
         next_commit = get_repo_object(repo, next_sha)
         if (
-            next_sha not in first_parents and not has_firstparent_child(
-                next_sha, first_parents, children_per_parent
+            next_sha not in first_parents_set and not has_firstparent_child(
+                next_sha, first_parents_set, children_per_parent
             ) or next_sha in commit.parents
         ):
             merge_children.add(next_sha)
 
         non_first_parents = (
-            parent
-            for parent in next_commit.parents if parent not in first_parents
+            parent for parent in next_commit.parents
+            if parent not in first_parents_set
         )
         for child_sha in non_first_parents:
-            if child_sha not in merge_children and child_sha != next_sha:
-                to_explore.add(child_sha)
+            if child_sha not in explored:
+                to_explore.append(child_sha)
 
     return merge_children
 
 
 def get_children_per_first_parent(repo_path):
-    repo = dulwich.repo.Repo(repo_path)
-    first_parents = get_first_parents(repo_path)
-    children_per_parent = get_children_per_parent(repo_path)
-    children_per_first_parent = OrderedDict()
+    repo = open_repo(repo_path)
+    first_parents, children_per_parent = walk_history(repo_path)
+    first_parents_set = set(first_parents)
+    # oldest first, that is the order all the callers need
+    children_per_first_parent = []
 
-    for first_parent in first_parents:
+    for first_parent in reversed(first_parents):
         commit = get_repo_object(repo, first_parent)
         if len(commit.parents) > 1:
             children = get_merged_commits(
                 repo=repo,
                 commit=commit,
-                first_parents=first_parents,
+                first_parents_set=first_parents_set,
                 children_per_parent=children_per_parent,
             )
         else:
             children = set()
 
-        children_per_first_parent[first_parent] = [
-            get_repo_object(repo, child) for child in children
-        ]
+        children_per_first_parent.append((
+            first_parent,
+            [get_repo_object(repo, child) for child in children],
+        ))
 
     return children_per_first_parent
 
@@ -267,12 +322,10 @@ def get_version(commit, tags, maj_version=0, feat_version=0, fix_version=0,
                 children=None):
     children = children or []
     commit_type = get_commit_type(commit, children)
-    commit_sha = commit.sha().hexdigest().encode('utf-8')
+    commit_sha = commit.id
 
     if commit_sha in tags:
-        maj_version, feat_version = tags[commit_sha].split(b'.')[:2]
-        maj_version = int(maj_version)
-        feat_version = int(feat_version)
+        maj_version, feat_version = tags[commit_sha]
         fix_version = 0
     elif commit_type == 'api_break':
         maj_version += 1
@@ -288,17 +341,54 @@ def get_version(commit, tags, maj_version=0, feat_version=0, fix_version=0,
     return version
 
 
+def get_versions(repo_path):
+    """
+    Walks the first parents history from the oldest commit, calculating the
+    version of each of them. The result is cached until the repo head
+    changes.
+
+    Args:
+        repo_path (str): path to the git repo
+
+    Returns:
+        list(tuple): (sha, commit, children, version) for each first parent
+            commit, oldest first
+    """
+    repo = open_repo(repo_path)
+    cache_key = (repo_path, repo.head())
+    if cache_key in _VERSIONS_CACHE:
+        return _VERSIONS_CACHE[cache_key]
+
+    tags = get_tags(repo)
+    version = (0, 0, 0)
+    versions = []
+    for commit_sha, children in get_children_per_first_parent(repo_path):
+        commit = get_repo_object(repo, commit_sha)
+        version = get_version(
+            commit=commit,
+            tags=tags,
+            maj_version=version[0],
+            feat_version=version[1],
+            fix_version=version[2],
+            children=children,
+        )
+        versions.append((commit_sha, commit, children, version))
+
+    _VERSIONS_CACHE[cache_key] = versions
+    return versions
+
+
 def is_api_break(commit):
     return (
-        MAJOR_HEADER.search(commit.message.decode('utf-8')) or
-        MAJOR_INVENIO.search(commit.message.decode('utf-8'))
+        MAJOR_HEADER.search(commit.message) or
+        MAJOR_INVENIO.search(commit.message)
     )
 
 
 def is_feature(commit):
     return (
-        FEAT_HEADER.search(commit.message.decode('utf-8')) or
-        FEAT_INVENIO.search(commit.message.decode('utf-8'))
+        FEAT_HEADER.search(commit.message) or
+        FEAT_INVENIO.search(commit.message)
     )
 
 
@@ -309,9 +399,7 @@ def get_commit_type(commit, children=None, tags=None, prev_version=None):
     commit_sha = commit.sha().hexdigest()
 
     if commit_sha in tags:
-        maj_version, feat_version = tags[commit_sha].split(b'.')[:2]
-        maj_version = int(maj_version)
-        feat_version = int(feat_version)
+        maj_version, feat_version = tags[commit_sha]
         if maj_version > prev_version[0]:
             return 'api_break'
         elif feat_version > prev_version[1]:
@@ -326,77 +414,83 @@ def get_commit_type(commit, children=None, tags=None, prev_version=None):
         return 'bug'
 
 
-def get_changelog(repo_path, from_commit=None):
+def iter_changelog(repo_path, from_commit=None):
     """
     Given a repo path and an option commit/tag/refspec to start from, will
-    get the rpm compatible changelog
+    generate the rpm compatible changelog entries, newest first
 
     Args:
         repo_path (str): path to the git repo
         from_commit (str): refspec (partial commit hash, tag, branch, full
             refspec, partial refspec) to start the changelog from
 
-    Returns:
-        str: Rpm compatible changelog
+    Yields:
+        str: Rpm compatible changelog entry for each first parent commit
     """
-    repo = dulwich.repo.Repo(repo_path)
-    tags = get_tags(repo)
-    refs = get_refs(repo)
-    changelog = []
-    maj_version = 0
-    feat_version = 0
-    fix_version = 0
-    start_including = False
+    repo = open_repo(repo_path)
+    tags, refs = load_refs(repo)
+    versions = get_versions(repo_path)
 
-    cur_line = ''
+    first_included = None
     if from_commit is None:
-        start_including = True
-
-    prev_version = (maj_version, feat_version, fix_version)
+        first_included = 0
+    else:
+        fuzzy_ref = from_commit.encode('utf-8')
+        for index, (commit_sha, _, _, _) in enumerate(versions):
+            if (
+                commit_sha.startswith(from_commit) or
+                fuzzy_matches_refs(fuzzy_ref, refs.get(commit_sha, []))
+            ):
+                first_included = index
+                break
+
+    if first_included is None:
+        return
+
+    for index in range(len(versions) - 1, first_included - 1, -1):
+        commit_sha, commit, children, version = versions[index]
+        version_str = '%s.%s.%s' % version
+        prev_version = versions[index - 1][3] if index else (0, 0, 0)
 
-    for commit_sha, children in reversed(
-        get_children_per_first_parent(repo_path).items()
-    ):
-        commit = get_repo_object(repo, commit_sha)
-        maj_version, feat_version, fix_version = get_version(
+        commit_type = get_commit_type(
             commit=commit,
-            tags=tags,
-            maj_version=maj_version,
-            feat_version=feat_version,
-            fix_version=fix_version,
             children=children,
+            tags=tags,
+            prev_version=prev_version,
         )
-        version = (maj_version, feat_version, fix_version)
-        version_str = '%s.%s.%s' % version
-
-        if (
-            start_including or commit_sha.startswith(from_commit) or
-            fuzzy_matches_refs(from_commit, refs.get(commit_sha, []))
-        ):
-            commit_type = get_commit_type(
-                commit=commit,
-                children=children,
-                tags=tags,
-                prev_version=prev_version,
+        lines = [pretty_commit(commit, version_str, commit_type)]
+        # the merged commits are all shown with the type of the merge
+        # commit itself (without its children), so get it only once
+        commit_type = get_commit_type(
+            commit=commit,
+            tags=tags,
+            prev_version=prev_version,
+        )
+        lines.extend(
+            pretty_commit(
+                commit=child,
+                version=None,
+                commit_type=commit_type
             )
-            cur_line = pretty_commit(commit, version_str, commit_type)
-            for child in children:
-                commit_type = get_commit_type(
-                    commit=commit,
-                    tags=tags,
-                    prev_version=prev_version,
-                )
-                cur_line += pretty_commit(
-                    commit=child,
-                    version=None,
-                    commit_type=commit_type
-                )
-            start_including = True
-            changelog.append(cur_line)
+            for child in children
+        )
+        yield ''.join(lines)
 
-        prev_version = version
 
-    return '\n'.join(reversed(changelog))
+def get_changelog(repo_path, from_commit=None):
+    """
+    Given a repo path and an option commit/tag/refspec to start from, will
+    get the rpm compatible changelog
+
+    Args:
+        repo_path (str): path to the git repo
+        from_commit (str): refspec (partial commit hash, tag, branch, full
+            refspec, partial refspec) to start the changelog from
+
+    Returns:
+        str: Rpm compatible changelog
+    """
+    return '\n'.join(iter_changelog(repo_path, from_commit))
 
 
 def get_current_version(repo_path):
@@ -413,26 +507,10 @@ def get_current_version(repo_path):
 
     And counting any other as a bugfix
     """
-    repo = dulwich.repo.Repo(repo_path)
-    tags = get_tags(repo)
-    maj_version = 0
-    feat_version = 0
-    fix_version = 0
-
-    for commit_sha, children in reversed(
-            get_children_per_first_parent(repo_path).items()
-    ):
-        commit = get_repo_object(repo, commit_sha)
-        maj_version, feat_version, fix_version = get_version(
-            commit=commit,
-            tags=tags,
-            maj_version=maj_version,
-            feat_version=feat_version,
-            fix_version=fix_version,
-            children=children,
-        )
-
-    return '%s.%s.%s' % (maj_version, feat_version, fix_version)
+    versions = get_versions(repo_path)
+    if not versions:
+        return '0.0.0'
+    return '%s.%s.%s' % versions[-1][3]
 
 
 def get_authors(repo_path, from_commit):
@@ -440,21 +518,20 @@ def get_authors(repo_path, from_commit):
     Given a repo and optionally a base revision to start from, will return
     the list of authors.
     """
-    repo = dulwich.repo.Repo(repo_path)
+    repo = open_repo(repo_path)
     refs = get_refs(repo)
     start_including = False
     authors = set()
 
     if from_commit is None:
         start_including = True
+    else:
+        fuzzy_ref = from_commit.encode('utf-8')
 
-    for commit_sha, children in reversed(
-        get_children_per_first_parent(repo_path).items()
-    ):
-        commit = get_repo_object(repo, commit_sha)
+    for commit_sha, commit, children, _ in get_versions(repo_path):
         if (
             start_including or commit_sha.startswith(from_commit) or
-            fuzzy_matches_refs(from_commit, refs.get(commit_sha, []))
+            fuzzy_matches_refs(fuzzy_ref, refs.get(commit_sha, []))
         ):
             authors.add(commit.author.decode())
             for child in children:
@@ -471,41 +548,26 @@ def get_releasenotes(repo_path, from_commit):
     a text suitable for the relase notes announcement, grouping the bugs, the
     features and the api-breaking changes.
     """
-    repo = dulwich.repo.Repo(repo_path)
-    tags = get_tags(repo)
-    refs = get_refs(repo)
-    maj_version = 0
-    feat_version = 0
-    fix_version = 0
+    repo = open_repo(repo_path)
+    tags, refs = load_refs(repo)
     start_including = False
     bugs = []
     features = []
     api_break_changes = []
 
-    cur_line = ''
     if from_commit is None:
         start_including = True
+    else:
+        fuzzy_ref = from_commit.encode('utf-8')
 
-    prev_version = (maj_version, feat_version, fix_version)
+    prev_version = (0, 0, 0)
 
-    for commit_sha, children in reversed(
-        get_children_per_first_parent(repo_path).items()
-    ):
-        commit = get_repo_object(repo, commit_sha)
-        maj_version, feat_version, fix_version = get_version(
-            commit=commit,
-            tags=tags,
-            maj_version=maj_version,
-            feat_version=feat_version,
-            fix_version=fix_version,
-            children=children,
-        )
-        version = (maj_version, feat_version, fix_version)
+    for commit_sha, commit, children, version in get_versions(repo_path):
         version_str = '%s.%s.%s' % version
 
         if (
             start_including or commit_sha.startswith(from_commit) or
-            fuzzy_matches_refs(from_commit, refs.get(commit_sha, []))
+            fuzzy_matches_refs(fuzzy_ref, refs.get(commit_sha, []))
         ):
             parent_commit_type = get_commit_type(
                 commit=commit,
@@ -513,18 +575,23 @@ def get_releasenotes(repo_path, from_commit):
                 tags=tags,
                 prev_version=prev_version,
             )
-            cur_line = pretty_commit(commit, version_str, parent_commit_type)
-            for child in children:
-                commit_type = get_commit_type(
-                    commit=commit,
-                    tags=tags,
-                    prev_version=prev_version,
-                )
-                cur_line += pretty_commit(
+            lines = [pretty_commit(commit, version_str, parent_commit_type)]
+            # the merged commits are all shown with the type of the merge
+            # commit itself (without its children), so get it only once
+            commit_type = get_commit_type(
+                commit=commit,
+                tags=tags,
+                prev_version=prev_version,
+            )
+            lines.extend(
+                pretty_commit(
                     commit=child,
                     version=None,
                     commit_type=commit_type
                 )
+                for child in children
+            )
+            cur_line = ''.join(lines)
             start_including = True
 
             if parent_commit_type == 'api_break':
@@ -572,7 +639,7 @@ def main(args):
         default=None,
         help='Commit to start the changelog from'
     )
-    changelog_parser.set_defaults(func=get_changelog)
+    changelog_parser.set_defaults(func=iter_changelog)
     version_parser = subparsers.add_parser('version')
     version_parser.set_defaults(func=get_current_version)
     releasenotes_parser = subparsers.add_parser('releasenotes')
@@ -591,10 +658,21 @@ def main(args):
     authors_parser.set_defaults(func=get_authors)
     args = parser.parse_args(args)
 
-    params = copy.deepcopy(vars(args))
-    params.pop('func')
+    params = dict(
+        (key, value) for key, value in vars(args).items() if key != 'func'
+    )
+    if args.func is iter_changelog:
+        # write each entry as soon as it's generated, instead of building
+        # the whole changelog in memory
+        for index, entry in enumerate(iter_changelog(**params)):
+            sys.stdout.write('\n' + entry if index else entry)
+        sys.stdout.write('\n')
+        return None
+
     return args.func(**params)
 
 
 if __name__ == '__main__':
-    print(main(sys.argv[1:]))
+    output = main(sys.argv[1:])
+    if output is not None:
+        print(output)
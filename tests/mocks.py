@@ -1,4 +1,4 @@
-from copy import deepcopy
+import json
 
 
 class ResponseMock(object):
@@ -11,6 +11,22 @@ class ResponseMock(object):
     def ok(self):
         return self.status_code < 400
 
+    @property
+    def content(self):
+        return self.text.encode('utf-8')
+
+    def json(self):
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size=1):
+        content = self.content
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+
+
+# returned for any unmapped url, shared as it's never modified
+NOT_FOUND = ResponseMock(None, code=404, text='')
+
 
 class SessionMock(object):
 
@@ -18,27 +34,38 @@ class SessionMock(object):
         self.url = url
         self.v = version
         self.headers = {}
+        self.adapters = {}
         self.auth = None
         self.dr = {
             "GET": {
                 self.url: ResponseMock(self.url, text="Version %s" % self.v),
             }
         }
-        self.r = None
-        self.map_responses(dict())
+        # map_responses always builds new mappings, so the defaults can be
+        # used as they are until then
+        self.r = self.dr
+        # method, url and options of each request done through request()
+        self.requests = []
 
     def __call__(self):
         return self
 
+    def mount(self, prefix, adapter):
+        self.adapters[prefix] = adapter
+
     def map_responses(self, dict_):
-        self.r = deepcopy(self.dr)
+        # the responses are never modified, only the mappings
+        self.r = dict(
+            (method, dict(responses)) for method, responses in self.dr.items()
+        )
         self.r.update(dict_)
 
     def mapping(self, method, url, **kwargs):
-        try:
-            return self.r[method][url]
-        except KeyError as ex:
-            return ResponseMock(url, code=404, text=str(ex))
+        return self.r.get(method, {}).get(url, NOT_FOUND)
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs))
+        return self.mapping(method, url)
 
     def get(self, url, **kwargs):
         return self.mapping('GET', url)
@@ -2,29 +2,46 @@
 # encoding: utf-8
 from __future__ import absolute_import, division, print_function
 
+import json
 import os
-import six
+import shutil
+import sys
 
 import pytest
-from foreman.client import Foreman, Resource, requests
+from foreman import client
+from foreman.client import Foreman, ForemanException, Resource, requests
 
-from .mocks import SessionMock
+from .mocks import ResponseMock, SessionMock
 
 
 URL = 'foreman.example.com'
 
 
+@pytest.fixture(scope='session', autouse=True)
+def restore_session():
+    """
+    The tests replace requests.Session with a SessionMock with the responses
+    each one needs, make sure the real one is back once they are done.
+    """
+    orig_session = requests.Session
+    yield
+    requests.Session = orig_session
+
+
 class HasConflictingMethods(Exception):
     def __init__(self, resource, conflicting_methods):
+        self.resource = resource
+        self.conflicting_methods = conflicting_methods
         super(HasConflictingMethods, self).__init__(
-            '%s has conflicting methods:' +
-            '\n    '.join(str(method) for method in conflicting_methods)
+            '%s has conflicting methods:\n    %s' % (
+                resource,
+                '\n    '.join(str(method) for method in conflicting_methods),
+            )
         )
 
 
-def check_api(url, foreman_version, api_version, cache_dir):
-    cli = generate_api(url, foreman_version, api_version, cache_dir)
-    for value in six.itervalues(cli.__dict__):
+def check_api(cli):
+    for value in cli.__dict__.values():
         if not isinstance(value, Resource):
             continue
 
@@ -33,7 +50,6 @@ def check_api(url, foreman_version, api_version, cache_dir):
 
 def generate_api(url, foreman_version, api_version, cache_dir):
     requests.Session = SessionMock(url, foreman_version)
-    print("Generating api")
     return Foreman(
         url,
         version=foreman_version,
@@ -43,9 +59,8 @@ def generate_api(url, foreman_version, api_version, cache_dir):
 
 
 def check_resource(resource):
-    print("Checking resource: %s" % resource)
-    conflicting_methods = getattr(resource, '_conflicting_methods', [])
-    if getattr(resource, '_conflicting_methods', []):
+    conflicting_methods = getattr(resource, '_conflicting_methods', None)
+    if conflicting_methods:
         raise HasConflictingMethods(
             resource,
             conflicting_methods,
@@ -57,9 +72,14 @@ def check_resource(resource):
 def api_versions_in_dir(defs_dir):
     api_versions = []
     for json_file in os.listdir(defs_dir):
-        if json_file.endswith('.json'):
-            version = json_file.strip('.json').rsplit('-', 1)
-            api_versions.append(version)
+        if not json_file.endswith('.json'):
+            continue
+
+        # strip would also eat any leading or trailing '.', 'j', 's', 'o', 'n'
+        base_name = json_file[:-len('.json')]
+        foreman_version, sep, api_version = base_name.rpartition('-')
+        if sep:
+            api_versions.append((foreman_version, api_version))
 
     return api_versions
 
@@ -78,18 +98,364 @@ def all_api_versions():
     return api_versions
 
 
-@pytest.mark.parametrize(
-    'api_version',
-    all_api_versions(),
-    ids=[':'.join(ver) for ver in all_api_versions()],
+API_VERSIONS = all_api_versions()
+
+
+@pytest.fixture(scope='session')
+def defs_cache_dir(tmpdir_factory):
+    """
+    Cache dir with a copy of the fixture definitions, so the compiled caches
+    generated by the tests don't end up in the source tree.
+    """
+    cache_dir = tmpdir_factory.mktemp('cache')
+    defs_dir = cache_dir.mkdir('definitions')
+    fixtures_dir = 'tests/fixtures/definitions'
+    for json_file in os.listdir(fixtures_dir):
+        if json_file.endswith('.json'):
+            shutil.copy(os.path.join(fixtures_dir, json_file), str(defs_dir))
+
+    return str(cache_dir)
+
+
+@pytest.fixture(
+    scope='session',
+    params=API_VERSIONS,
+    ids=[':'.join(ver) for ver in API_VERSIONS],
 )
-def test_apis(api_version, capsys):
+def api(request, defs_cache_dir):
+    foreman_version, api_version = request.param
+    return generate_api(
+        url=URL,
+        foreman_version=foreman_version,
+        api_version=api_version.strip('v'),
+        cache_dir=defs_cache_dir,
+    )
+
+
+def test_apis(api, capsys):
     try:
-        check_api(
-            url=URL,
-            foreman_version=api_version[0],
-            api_version=api_version[1].strip('v'),
-            cache_dir='tests/fixtures',
-        )
+        check_api(api)
     except HasConflictingMethods as error:
         print('Got conflicting methods: %s' % error)
+
+
+def test_compiled_defs_cache(tmpdir):
+    cache_dir = str(tmpdir)
+    fresh_cli = generate_api(URL, '1.9.2', '2', cache_dir)
+    assert os.path.exists(
+        os.path.join(cache_dir, 'definitions', '1.9.2-v2.pyc-cache')
+    )
+
+    # make sure the classes are loaded from disk, not from memory
+    client._RESOURCE_CLASS_CACHE.clear()
+    cached_cli = generate_api(URL, '1.9.2', '2', cache_dir)
+    for name, value in fresh_cli.__dict__.items():
+        if not isinstance(value, Resource):
+            continue
+
+        cached_value = getattr(cached_cli, name)
+        assert cached_value._own_methods == value._own_methods
+        for method_name in value._own_methods:
+            method = getattr(value, method_name)
+            cached_method = getattr(cached_value, method_name)
+            assert cached_method.__doc__ == method.__doc__
+            assert cached_method.defs.url == method.defs.url
+
+
+@pytest.mark.parametrize('use_compiled_cache', [False, True])
+def test_lazy_resources(tmpdir, use_compiled_cache):
+    cache_dir = str(tmpdir)
+    cli = generate_api(URL, '1.9.2', '2', cache_dir)
+    if not use_compiled_cache:
+        os.remove(os.path.join(cache_dir, 'definitions', '1.9.2-v2.pyc-cache'))
+
+    lazy_cli = Foreman(
+        URL,
+        version='1.9.2',
+        api_version='2',
+        cache_dir=cache_dir,
+        lazy=True,
+    )
+    assert not any(
+        isinstance(value, Resource)
+        for name, value in lazy_cli.__dict__.items()
+        if name != 'plugins'
+    )
+    assert lazy_cli.index_hosts.__doc__ == cli.index_hosts.__doc__
+    for name, value in cli.__dict__.items():
+        if isinstance(value, Resource):
+            assert getattr(lazy_cli, name)._own_methods == value._own_methods
+
+    with pytest.raises(AttributeError):
+        lazy_cli.nonexisting_resource
+
+
+def test_lazy_resource_error(tmpdir):
+    generate_api(URL, '1.9.2', '2', str(tmpdir))
+    lazy_cli = Foreman(
+        URL,
+        version='1.9.2',
+        api_version='2',
+        cache_dir=str(tmpdir),
+        lazy=True,
+    )
+    hosts_factory = lazy_cli._resource_factories['hosts']
+    failures = []
+
+    def failing_once_factory():
+        if not failures:
+            failures.append(True)
+            raise IOError('Unable to read the definitions')
+        return hosts_factory()
+
+    lazy_cli._resource_factories['hosts'] = failing_once_factory
+    with pytest.raises(IOError):
+        lazy_cli.hosts
+
+    assert 'index' in lazy_cli.hosts._own_methods
+    assert 'hosts' not in lazy_cli._resource_factories
+
+
+def test_remote_defs(tmpdir):
+    cache_dir = str(tmpdir)
+    apidoc_url = '%s/apidoc/v2.json' % URL
+    with open('foreman/definitions/1.9.2-v2.json') as defs_fd:
+        defs = defs_fd.read()
+
+    requests.Session = SessionMock(URL, '1.9.2')
+    requests.Session.map_responses({
+        'GET': {
+            URL: ResponseMock(URL, text='Version 1.9.2'),
+            apidoc_url: ResponseMock(apidoc_url, text=defs),
+        },
+    })
+    cli = Foreman(
+        URL,
+        version='1.9.2',
+        api_version='2',
+        cache_dir=cache_dir,
+        use_cache=False,
+    )
+    assert cli.index_hosts.defs.url == '/api/hosts'
+    assert os.listdir(os.path.join(cache_dir, 'definitions')) == [
+        '1.9.2-v2.json',
+    ]
+
+
+def test_remote_defs_write_error(tmpdir):
+    cache_dir = str(tmpdir)
+    apidoc_url = '%s/apidoc/v2.json' % URL
+    with open('foreman/definitions/1.9.2-v2.json') as defs_fd:
+        defs = ResponseMock(apidoc_url, text=defs_fd.read())
+
+    def iter_content(chunk_size=1):
+        yield defs.content[:chunk_size]
+        raise IOError('No space left on device')
+
+    defs.iter_content = iter_content
+    requests.Session = SessionMock(URL, '1.9.2')
+    requests.Session.map_responses({
+        'GET': {
+            URL: ResponseMock(URL, text='Version 1.9.2'),
+            apidoc_url: defs,
+        },
+    })
+    cli = Foreman(
+        URL,
+        version='1.9.2',
+        api_version='2',
+        cache_dir=cache_dir,
+        use_cache=False,
+    )
+    assert cli.index_hosts.defs.url == '/api/hosts'
+    assert os.listdir(os.path.join(cache_dir, 'definitions')) == []
+
+
+def test_get_cache(tmpdir):
+    hosts_url = '%s/api/hosts' % URL
+    cli = generate_api(URL, '1.9.2', '2', str(tmpdir))
+    cached_cli = Foreman(
+        URL,
+        version='1.9.2',
+        api_version='2',
+        cache_dir=str(tmpdir),
+        cache_gets=True,
+    )
+    session = requests.Session
+    session.map_responses({
+        'GET': {hosts_url: ResponseMock(hosts_url, text='{"results": []}')},
+    })
+
+    def hosts_gets():
+        return len([
+            request for request in session.requests
+            if request[:2] == ('GET', hosts_url)
+        ])
+
+    cli.index_hosts()
+    cli.index_hosts()
+    assert hosts_gets() == 2
+
+    cached_cli.index_hosts()
+    cached_cli.index_hosts()
+    assert hosts_gets() == 3
+    cached_cli.index_hosts(search='name=test')
+    assert hosts_gets() == 4
+
+    cached_cli.destroy_hosts(id=1)
+    cached_cli.index_hosts()
+    assert hosts_gets() == 5
+
+
+def test_session_retries(tmpdir):
+    cli = generate_api(URL, '1.9.2', '2', str(tmpdir))
+    for prefix in ('http://', 'https://'):
+        max_retries = cli.session.adapters[prefix].max_retries
+        # only the connections that could not be established are retried
+        assert max_retries.connect == 3
+        assert not max_retries.read
+        assert not max_retries.status_forcelist
+
+
+def test_falsy_params_sent(tmpdir):
+    cli = generate_api(URL, '1.9.2', '2', str(tmpdir))
+    cli.index_hosts(per_page=0, search='')
+    method, url, kwargs = requests.Session.requests[-1]
+    assert (method, url) == ('GET', '%s/api/hosts' % URL)
+    assert kwargs['params'] == {'per_page': 0, 'search': ''}
+
+
+def test_do_get_many(tmpdir, monkeypatch):
+    cli = generate_api(URL, '1.9.2', '2', str(tmpdir))
+    urls = ['/api/hosts/%d' % host_id for host_id in range(20)]
+    responses = dict(
+        (URL + url, ResponseMock(URL + url, text='{"id": %d}' % host_id))
+        for host_id, url in enumerate(urls)
+    )
+    responses[URL + '/api/broken'] = ResponseMock(
+        URL + '/api/broken',
+        code=500,
+        text='Internal Server Error',
+    )
+    requests.Session.map_responses({'GET': responses})
+    pool_sizes = []
+
+    futures = pytest.importorskip('concurrent.futures')
+    thread_pool_executor = futures.ThreadPoolExecutor
+
+    def sized_thread_pool_executor(max_workers):
+        pool_sizes.append(max_workers)
+        return thread_pool_executor(max_workers=max_workers)
+
+    monkeypatch.setattr(
+        futures,
+        'ThreadPoolExecutor',
+        sized_thread_pool_executor,
+    )
+
+    results = cli.do_get_many([(url, {}) for url in urls], max_workers=4)
+    assert results == [{'id': host_id} for host_id in range(20)]
+    assert pool_sizes == [4]
+
+    with pytest.raises(ForemanException):
+        cli.do_get_many([(urls[0], {}), ('/api/broken', {})])
+
+
+def test_do_get_many_sequential(tmpdir, monkeypatch):
+    cli = generate_api(URL, '1.9.2', '2', str(tmpdir))
+    urls = ['/api/hosts/%d' % host_id for host_id in range(3)]
+    requests.Session.map_responses({
+        'GET': dict(
+            (URL + url, ResponseMock(URL + url, text='{"id": %d}' % host_id))
+            for host_id, url in enumerate(urls)
+        ),
+    })
+    # as if the futures backport was not installed
+    monkeypatch.setitem(sys.modules, 'concurrent.futures', None)
+
+    results = cli.do_get_many([(url, {}) for url in urls])
+    assert results == [{'id': host_id} for host_id in range(3)]
+
+
+def test_version_detected_once(tmpdir):
+    url = 'foreman-autodetect.example.com'
+    requests.Session = SessionMock(url, '1.9.2')
+    cli = Foreman(
+        url,
+        api_version='2',
+        cache_dir=str(tmpdir),
+        version_cache_ttl=60,
+    )
+    assert cli.version == '1.9.2'
+
+    requests.Session.map_responses({'GET': {}})
+    shutil.rmtree(os.path.join(str(tmpdir), 'versions'))
+    cli = Foreman(
+        url,
+        api_version='2',
+        cache_dir=str(tmpdir),
+        version_cache_ttl=60,
+    )
+    assert cli.version == '1.9.2'
+
+
+def test_version_detected_each_time(tmpdir):
+    url = 'foreman-upgraded.example.com'
+    requests.Session = SessionMock(url, '1.7.2')
+    cli = Foreman(url, api_version='2', cache_dir=str(tmpdir))
+    assert cli.version == '1.7.2'
+
+    requests.Session = SessionMock(url, '1.9.2')
+    cli = Foreman(url, api_version='2', cache_dir=str(tmpdir))
+    assert cli.version == '1.9.2'
+
+
+def test_resource_classes_reused(tmpdir):
+    cli = generate_api(URL, '1.9.2', '2', str(tmpdir))
+    other_cli = generate_api(URL, '1.9.2', '2', str(tmpdir))
+    assert other_cli.hosts.__class__ is cli.hosts.__class__
+    assert other_cli.hosts._foreman is other_cli
+    assert other_cli.index_hosts.__self__ is other_cli.hosts
+
+
+def test_resource_classes_follow_defs(tmpdir):
+    defs_path = tmpdir.mkdir('definitions').join('1.9.2-v2.json')
+    with open('foreman/definitions/1.9.2-v2.json') as defs_fd:
+        defs = json.load(defs_fd)
+    defs_path.write(json.dumps(defs))
+    cli = generate_api(URL, '1.9.2', '2', str(tmpdir))
+    assert 'destroy' in cli.hosts._own_methods
+
+    defs['docs']['resources']['hosts']['methods'] = [
+        method for method in defs['docs']['resources']['hosts']['methods']
+        if method['name'] != 'destroy'
+    ]
+    defs_path.write(json.dumps(defs))
+    # make sure the change is noticed even with coarse mtimes
+    defs_path.setmtime(defs_path.mtime() + 10)
+    other_cli = generate_api(URL, '1.9.2', '2', str(tmpdir))
+    assert other_cli.hosts.__class__ is not cli.hosts.__class__
+    assert 'destroy' not in other_cli.hosts._own_methods
+
+
+def test_version_hint(tmpdir):
+    url = 'foreman-hint.example.com'
+    requests.Session = SessionMock(url, '1.9.2')
+    cli = Foreman(
+        url,
+        api_version='2',
+        cache_dir=str(tmpdir),
+        version_cache_ttl=60,
+    )
+    assert cli.version == '1.9.2'
+
+    # simulate a new process, with the server down
+    client._SERVER_VERSION_CACHE.clear()
+    requests.Session.map_responses({'GET': {}})
+    cli = Foreman(
+        url,
+        api_version='2',
+        cache_dir=str(tmpdir),
+        version_cache_ttl=60,
+    )
+    assert cli.version == '1.9.2'